@@ -3,6 +3,7 @@ import json
 from pathlib import Path
 
 import joblib
+import numpy as np
 import pandas as pd
 from sklearn.linear_model import LogisticRegression
 
@@ -15,13 +16,19 @@ def main():
     data = pd.read_csv("generated_dataset.csv")
 
     # (opcjonalnie) utrzymujemy te same kroki przygotowania co wcześniej
-    data["sector"] = data["sector"].astype("string")
-    data["key_target"] = data.groupby("id")["credit_limit"].transform("mean")
+    data["sector"] = data["sector"].astype("category")
+    data["id"] = data["id"].astype("category")
+    # średnia per id (groupby po kodach kategorii) rozlana na wiersze przez map
+    means = data.groupby("id", sort=False, observed=True)["credit_limit"].mean()
+    data["key_target"] = data["id"].map(means).astype(float)
 
     # 2) Definicja cech/targetu – tak, by zgadzało się z tym, co podasz później do modelu
     drop_cols = ["def_ind_1m", "def_ind_2m", "def_ind_3m", "date", "sector", "id"]
     X_train = data.drop(columns=drop_cols, axis=1)
-    X_train = X_train.fillna(0)  # logit nie lubi NaN-ów
+    feature_list = list(X_train.columns)
+    # float32 ndarray (połowa pamięci), NaN-y zerowane w miejscu – bez kopii całej ramki
+    # logit nie lubi NaN-ów
+    X_train = np.nan_to_num(X_train.to_numpy(dtype=np.float32), copy=False, nan=0.0)
     # X_train.isna().sum().sum()  # sprawdzenie liczby NaN-ów
 
     y_train = data["def_ind_1m"].astype(int)  # logit wymaga b
@@ -36,7 +43,6 @@ def main():
 
     # 4) Zapis modelu i schematu cech
     joblib.dump(model, ARTIFACT_DIR / "model.joblib")
-    feature_list = list(X_train.columns)
     (ARTIFACT_DIR / "feature_list.json").write_text(json.dumps(feature_list, indent=2))
 
     print("Saved:", ARTIFACT_DIR.resolve())
@@ -1,7 +1,8 @@
 # %%
 
 # deploy_vertex_sklearn.py
-from google.cloud import aiplatform
+from google.cloud import aiplatform, storage
+import base64
 import csv
 import sklearn, sys
 
@@ -16,8 +17,8 @@ ENDPOINT_DISPLAY_NAME = "sklogit-pd-1m-endpoint"
 # Prebuilt scikit-learn prediction container (CPU)
 # (dobierz regionowy prefix: us-/europe-/asia-)
 ver = sklearn.__version__  # np. '1.5.1'
-major_minor = ".".join(ver.split(".")[:2])  # '1.5'
-image = f"us-docker.pkg.dev/vertex-ai/prediction/sklearn-cpu.{major_minor.replace('.', '-')}:latest"
+major_minor = "-".join(ver.split(".")[:2])  # '1-5'
+image = f"us-docker.pkg.dev/vertex-ai/prediction/sklearn-cpu.{major_minor}:latest"
 print("Use image:", image)
 # SERVING_IMAGE = "us-docker.pkg.dev/vertex-ai/prediction/sklearn-cpu.1-7:latest"
 SERVING_IMAGE = image
@@ -26,12 +27,42 @@ SERVING_IMAGE = image
 # def main():
 aiplatform.init(project=PROJECT_ID, location=REGION)
 
-print("📦 Uploading model to Vertex AI…")
-model = aiplatform.Model.upload(
-    display_name=MODEL_DISPLAY_NAME,
-    artifact_uri=ARTIFACT_URI,
-    serving_container_image_uri=SERVING_IMAGE,
+# md5 artefaktu w GCS – jeśli model.joblib się nie zmienił, nie wrzucamy modelu ponownie
+bucket_name, _, prefix = ARTIFACT_URI.removeprefix("gs://").partition("/")
+blob = (
+    storage.Client(project=PROJECT_ID)
+    .bucket(bucket_name)
+    .get_blob(f"{prefix.rstrip('/')}/model.joblib")
 )
+# brak model.joblib (np. model.pkl/model.bst) albo brak md5 (obiekty złożone z
+# `gsutil -m`) → nie da się porównać artefaktu, więc po prostu wrzucamy model
+md5_b64 = blob.md5_hash if blob is not None else None
+labels = {"sklearn_version": major_minor}
+existing = []
+if md5_b64:
+    artifact_md5 = base64.b64decode(md5_b64).hex()
+    # etykiety Vertex AI: tylko [a-z0-9_-], stąd md5 w hex i wersja jako '1-5'
+    labels["artifact_md5"] = artifact_md5
+    existing = aiplatform.Model.list(
+        filter=(
+            f'display_name="{MODEL_DISPLAY_NAME}"'
+            f' AND labels.artifact_md5="{artifact_md5}"'
+            f' AND labels.sklearn_version="{major_minor}"'
+        ),
+        order_by="create_time desc",
+    )
+
+if existing:
+    print("♻️  Artifact unchanged, reusing model:", existing[0].resource_name)
+    model = aiplatform.Model(existing[0].resource_name)
+else:
+    print("📦 Uploading model to Vertex AI…")
+    model = aiplatform.Model.upload(
+        display_name=MODEL_DISPLAY_NAME,
+        artifact_uri=ARTIFACT_URI,
+        serving_container_image_uri=SERVING_IMAGE,
+        labels=labels,
+    )
 
 # %%
 
@@ -1,10 +1,35 @@
 # predict_vertex_sklearn.py
+from concurrent.futures import ThreadPoolExecutor
+
 from google.cloud import aiplatform
 import csv
+import numpy as np
 
 # === CONFIGURATION ===
 PROJECT_ID = "fifth-sprite-475713-q9"
 REGION = "us-central1"
+# ~9 liczb na rekord → 1000 rekordów mieści się w limicie ~1.5 MB na żądanie
+MAX_INSTANCES_PER_REQUEST = 1000
+MAX_WORKERS = 8
+
+
+def predict_batch(endpoint, rows):
+    """Score many rows: split into request-sized chunks and send them in parallel.
+
+    Returns the predictions (in input order) and the raw response of every chunk.
+    """
+    rows = np.asarray(rows, dtype=float)
+    if len(rows) == 0:
+        return [], []  # Vertex AI odrzuca predict(instances=[])
+    n_chunks = max(1, -(-len(rows) // MAX_INSTANCES_PER_REQUEST))
+    chunks = np.array_split(rows, n_chunks)
+    # wywołania endpointu czekają na sieć, więc wątki wystarczą
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, n_chunks)) as pool:
+        responses = list(
+            pool.map(lambda c: endpoint.predict(instances=c.tolist()), chunks)
+        )
+    return [p for r in responses for p in r.predictions], responses
+
 
 # wczytaj endpoint z poprzedniego deploya
 with open("endpoint_name.csv") as f:
@@ -18,12 +43,12 @@ aiplatform.init(project=PROJECT_ID, location=REGION)
 
 endpoint = aiplatform.Endpoint(ENDPOINT_NAME)
 
-# Vertex AI oczekuje listy rekordów (możesz wysłać batch)
-instances = [values]
+# Vertex AI oczekuje listy rekordów – predict_batch dzieli większe zbiory na paczki
+rows = [values]
 
-response = endpoint.predict(instances=instances)
+predictions, responses = predict_batch(endpoint, rows)
 
 print("✅ Prediction response:")
-print(response)
-print("Predicted probabilities:", response.predictions)
-print("Deployed model resource name:", response.deployed_model_id)
+print(responses[0])
+print("Predicted probabilities:", predictions)
+print("Deployed model resource name:", responses[0].deployed_model_id)
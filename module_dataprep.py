@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -20,33 +21,47 @@ def build_default_flags(df: pd.DataFrame, data_cutoff: pd.Timestamp) -> pd.DataF
       id, def_ind_1m, def_ind_2m, def_ind_3m  (all 0/1 at id level)
     """
     # Ensure proper dtypes
-    out = df.copy()
+    # shallow copy: columns are replaced (not modified in place), so df stays untouched
+    out = df.copy(deep=False)
     out["date"] = pd.to_datetime(out["date"]).dt.normalize()
+    # categorical id → groupby/join work on integer codes instead of hashing strings
+    out["id"] = out["id"].astype("category")
     data_cutoff = pd.to_datetime(data_cutoff).normalize()
 
     # All ids to report on (every id present in df)
     ids = out["id"].drop_duplicates().sort_values()
 
-    # flags = {}
-    for n in (1, 2, 3):
-        horizon_end = data_cutoff + pd.DateOffset(months=n)
-        # Window: strictly AFTER cutoff up to and including horizon_end
-        mask = (out["date"] > data_cutoff) & (out["date"] <= horizon_end)
-        # Any default within window for each id → 0/1
-        s = (
-            out.loc[mask]
-            .groupby("id")["default_ind"]
-            .max()  # any 1 → 1
-            .reindex(ids, fill_value=0)  # include ids with no rows in window
-            .astype(int)
-            .rename(f"def_ind_{n}m")
-        )
-
-        s = pd.DataFrame(s).reset_index()
-
-        out = pd.merge(out, s, on="id", how="left")
-
-        # remove obs before cutoff not to have data leakage
+    # Bucket of each row: 0 = on/before cutoff, n = in (cutoff + (n-1)M, cutoff + nM]
+    # for n=1,2,3, 4 = after cutoff + 3M
+    bounds = pd.DatetimeIndex(
+        [data_cutoff + pd.DateOffset(months=n) for n in (0, 1, 2, 3)]
+    )
+    # bucket via int64 nanoseconds (same unit on both sides) instead of Timestamps;
+    # NaT views as INT64_MIN and lands in bucket 0, i.e. outside every window
+    date_ns = out["date"].to_numpy(dtype="datetime64[ns]").view("i8")
+    bounds_ns = bounds.to_numpy(dtype="datetime64[ns]").view("i8")
+    bucket = np.searchsorted(bounds_ns, date_ns, side="left")
+    in_window = (bucket >= 1) & (bucket <= 3)
+
+    # Any default within each monthly bucket for each id → 0/1, then cumulative
+    # over buckets so def_ind_Nm covers the whole window (cutoff, cutoff + N months]
+    flags = (
+        out.loc[in_window]
+        .groupby(["id", bucket[in_window]], observed=True)["default_ind"]
+        .max()  # any 1 → 1
+        .unstack(fill_value=0)
+        # include ids with no rows in window
+        .reindex(index=ids, columns=[1, 2, 3], fill_value=0)
+        .cummax(axis=1)
+        .astype(int)
+        .rename(columns={n: f"def_ind_{n}m" for n in (1, 2, 3)})
+    )
+
+    # flags is keyed by unique id → index-aligned join instead of a hash merge
+    out = out.join(flags, on="id")
+
+    # remove obs before cutoff not to have data leakage
+    # (datetime comparison, so NaT dates are dropped - their i8 view would pass)
     out = out[out["date"] <= data_cutoff]
 
     return out